@@ -1,23 +1,46 @@
 #!/usr/bin/env python3
+"""Snowy Browser - a small tabbed browser built on PyQt6 / QtWebEngine.
+
+Performance note: everything here is Qt-bound or I/O-bound (widget updates,
+page navigation, small pickle files). There are no numeric inner loops, so
+Numba/Cython would only add import and dispatch overhead. Functions tagged
+"# perf: Qt-bound" have been checked and are not JIT candidates. If a real
+pure-Python hot loop shows up (e.g. bulk history processing), move it into
+its own module and compile that with @njit(cache=True), never this file.
+"""
 import sys
 import os
 import json
+import pickle
+import re
 import shutil
+import time
 
+from PyQt6 import sip
 from PyQt6.QtWidgets import *
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEngineScript
+from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineScript
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
 # ---------------- CONFIG ----------------
-SESSION_FILE = "session.json"
-BOOKMARKS_FILE = "bookmarks.json"
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".snowybrowser")
+SESSION_FILE = os.path.join(DATA_DIR, "session.pkl")
+BOOKMARKS_FILE = os.path.join(DATA_DIR, "bookmarks.pkl")
+LEGACY_SESSION_FILE = "session.json"  # pre-pickle formats, read once and converted
+LEGACY_BOOKMARKS_FILE = "bookmarks.json"
 EXTENSIONS_DIR = "extensions"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PERSISTENT_COOKIES = False  # set True to keep cookies between runs
 
 START_WIDTH = 1300
 START_HEIGHT = 850
 DEFAULT_ZOOM = 1.0
+TAB_CHROME_DELAY_MS = 200  # coalesce title/icon churn into one repaint
+SESSION_SAVE_DELAY_MS = 2000  # debounce for session writes
+DISCARD_AFTER_MS = 5 * 60 * 1000  # background tabs idle this long get discarded
+TAB_CHROME_POOL_SIZE = 8  # closed tab buttons kept around for reuse
+ICON_CACHE_SIZE = 256  # scaled favicons kept, oldest evicted first
 
 CHROME_UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -25,6 +48,87 @@ CHROME_UA = (
     "Chrome/122.0.0.0 Safari/537.36"
 )
 
+# Explicit scheme ("https://...") or about: page; anything else needs a guess
+_SCHEME_RE = re.compile(r'^(?:[a-z][a-z0-9+.\-]*://|about:)', re.IGNORECASE)
+# "scheme:" without "//" is only a URL for schemes we know; "intranet:3000" is a host
+_SCHEME_PREFIX_RE = re.compile(r'^([a-z][a-z0-9+.\-]*):', re.IGNORECASE)
+_OPAQUE_SCHEMES = {"data", "javascript", "mailto", "view-source", "file", "blob", "about"}
+# Bare host (name or bracketed IPv6) with optional port and path, e.g. "localhost:8080/app"
+_HOST_RE = re.compile(r'^(\[[0-9a-f:.]+\]|[\w.-]+)(:\d+)?(?:/|$)', re.IGNORECASE)
+
+# Applied once on the QApplication rather than per window
+_STYLE = """
+QMainWindow { background: #202124; }
+QLineEdit {
+    background: #3c4043;
+    border-radius: 18px;
+    padding: 6px 12px;
+    color: white;
+}
+QPushButton {
+    background: transparent;
+    color: white;
+    border: none;
+}
+QPushButton:hover {
+    background: #3c4043;
+    border-radius: 6px;
+}
+"""
+
+def _looks_like_host(text):
+    if "." in text:
+        return True
+    m = _HOST_RE.match(text)
+    return bool(m) and (m.group(2) is not None or m.group(1).startswith("[")
+                        or m.group(1).lower() == "localhost")
+
+def _has_known_scheme(text):
+    m = _SCHEME_PREFIX_RE.match(text)
+    return bool(m) and m.group(1).lower() in _OPAQUE_SCHEMES
+
+# ---------------- STORAGE ----------------
+def _dump(obj, path):
+    # Write to a temp file and swap it in so a crash never leaves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(obj, f, protocol=5)
+    os.replace(tmp, path)
+
+def _load(path, legacy_path):
+    # Pickle only from our own data dir; the old JSON file is migrated on first run
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    with open(legacy_path) as f:
+        obj = json.load(f)
+    _dump(obj, path)
+    return obj
+
+# ---------------- WORKERS ----------------
+class _RmtreeSignals(QObject):
+    finished = pyqtSignal(list)  # paths that could not be deleted
+
+class _RmtreeWorker(QRunnable):
+    # Deletes directory trees on a pool thread so the window stays responsive
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+        self.signals = _RmtreeSignals()
+
+    def run(self):
+        failed = []
+        record = lambda func, p, exc: failed.append(p)
+        for path in self.paths:
+            if sys.version_info >= (3, 12):
+                shutil.rmtree(path, onexc=record)
+            else:
+                shutil.rmtree(path, onerror=record)
+        self.signals.finished.emit(failed)
+
 # ---------------- MAIN BROWSER ----------------
 class Browser(QMainWindow):
     def __init__(self):
@@ -32,16 +136,63 @@ class Browser(QMainWindow):
         self.setWindowTitle("Modern PyQt6 Browser")
         self.resize(START_WIDTH, START_HEIGHT)
 
-        # Default profile
-        self.profile = QWebEngineProfile.defaultProfile()
-        self.profile.setHttpUserAgent(CHROME_UA)
+        # Where earlier versions kept site data; Kill All Data wipes it as well
+        self._legacy_storage = QWebEngineProfile.defaultProfile().persistentStoragePath()
+        self._init_profile()
+        self._ext_cache = {}  # (path, st_mtime_ns) -> source code
+
+        # Per-tab state, one dict per field keyed by view; frames defines the tab order
+        self.frames = {}
+        self.title_btns = {}
+        self.close_btns = {}
+        self.icons = {}
+        self.devtools = {}  # only tabs that have opened DevTools
+        self.last_active = {}
+        self.chrome_timers = {}
+        self.icon_keys = {}
+        self._urls = {}  # kept current by urlChanged so saving never queries the views
+        self._views_by_id = {}  # id(view) -> view, for slots keyed by sender
+        self._pending_titles = {}
+        self._pending_icons = {}
+        self._icon_cache = {}  # (icon.cacheKey(), size) -> QPixmap
+        self._tab_chrome_pool = []  # (frame, icon_label, title_btn, close_btn)
+
+        # Session is written shortly after tabs change, not only at exit
+        self._dirty = False
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.timeout.connect(self._persist_session)
 
-        self.tabs = {}
         self.init_ui()
         self.load_bookmarks()
         self.load_extensions()
         self.restore_session()
 
+        # Periodically discard tabs that have been frozen in the background for long
+        self.discard_timer = QTimer(self)
+        self.discard_timer.setInterval(60 * 1000)
+        self.discard_timer.timeout.connect(self.discard_stale_tabs)
+        self.discard_timer.start()
+
+    # ---------------- Profile ----------------
+    def _init_profile(self):
+        self.profile = QWebEngineProfile.defaultProfile()
+        if self.profile.isOffTheRecord():
+            # Qt 6's default profile is memory-only and ignores the disk settings below.
+            # Owned by the application so it outlives the window and every page on it
+            self.profile = QWebEngineProfile("snowybrowser", QApplication.instance())
+        self.profile.setHttpUserAgent(CHROME_UA)
+        # Bounded on-disk cache in our own data dir instead of Qt's unsized default
+        self.profile.setCachePath(os.path.join(DATA_DIR, "cache"))
+        self.profile.setPersistentStoragePath(os.path.join(DATA_DIR, "storage"))
+        self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+        self.profile.setHttpCacheMaximumSize(HTTP_CACHE_MAX_BYTES)
+        if PERSISTENT_COOKIES:
+            self.profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.AllowPersistentCookies)
+        else:
+            self.profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+        self._scripts = self.profile.scripts()  # owned by the profile, fetch once
+
     # ---------------- UI ----------------
     def init_ui(self):
         central = QWidget()
@@ -58,26 +209,34 @@ class Browser(QMainWindow):
         self.forward_btn = QPushButton("▶")
         self.refresh_btn = QPushButton("⟳")
         self.kill_btn = QPushButton("Kill All Data")
+        self.bookmark_btn = QPushButton("☆")
         self.devtools_btn = QPushButton("DevTools")  # DevTools button
+        self.extensions_btn = QPushButton("Extensions")
         self.kill_btn.setFixedWidth(120)
         self.devtools_btn.setFixedWidth(90)
+        self.extensions_btn.setFixedWidth(90)
         self.kill_btn.clicked.connect(self.kill_all_data)
+        self.bookmark_btn.clicked.connect(self.add_bookmark)
         self.devtools_btn.clicked.connect(self.toggle_devtools)  # Connect to toggle function
+        self.extensions_btn.clicked.connect(self.toggle_extensions)
 
-        for b in (self.back_btn, self.forward_btn, self.refresh_btn):
+        for b in (self.back_btn, self.forward_btn, self.refresh_btn, self.bookmark_btn):
             b.setFixedWidth(35)
 
         nav_bar.addWidget(self.url_bar)
         nav_bar.addWidget(self.back_btn)
         nav_bar.addWidget(self.forward_btn)
         nav_bar.addWidget(self.refresh_btn)
+        nav_bar.addWidget(self.bookmark_btn)
         nav_bar.addWidget(self.kill_btn)
         nav_bar.addWidget(self.devtools_btn)
+        nav_bar.addWidget(self.extensions_btn)
         main_layout.addLayout(nav_bar)
 
         # Bookmark bar
         self.bookmark_bar = QHBoxLayout()
         self.bookmark_bar.setSpacing(5)
+        self._bookmark_btns = []
         main_layout.addLayout(self.bookmark_bar)
 
         # Tab row (left-aligned)
@@ -98,32 +257,67 @@ class Browser(QMainWindow):
         main_layout.addLayout(self.tab_bar_layout)
 
         # Web content
-        self.stack = QStackedWidget()
-        main_layout.addWidget(self.stack)
-
-        # Extensions panel
-        self.extension_dock = QDockWidget("Extensions", self)
-        self.extension_list = QListWidget()
-        self.extension_dock.setWidget(self.extension_list)
-        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.extension_dock)
-        self.extension_dock.hide()
+        # Every view lives here so the window owns it; only the current one is shown
+        self.view_host = QWidget()
+        self.view_host_layout = QVBoxLayout(self.view_host)
+        self.view_host_layout.setContentsMargins(0,0,0,0)
+        main_layout.addWidget(self.view_host)
+        self._active_tab = None
 
         # Navigation buttons
         self.back_btn.clicked.connect(lambda: self.current_tab().back())
         self.forward_btn.clicked.connect(lambda: self.current_tab().forward())
         self.refresh_btn.clicked.connect(lambda: self.current_tab().reload())
 
-        self.apply_style()
-
     # ---------------- Tabs ----------------
     def new_tab(self, url="https://www.google.com"):
         view = QWebEngineView()
+        # Bind the page to the shared profile up front instead of letting the view build its own
+        view.setPage(QWebEnginePage(self.profile, view))
         view.setUrl(QUrl.fromUserInput(url))
         view.setZoomFactor(DEFAULT_ZOOM)
+        self.view_host_layout.addWidget(view)
+        view.hide()  # shown by switch_tab below
+
+        # Tab button, recycled from a closed tab when possible
+        if self._tab_chrome_pool:
+            frame, icon_label, title_btn, close_btn = self._tab_chrome_pool.pop()
+            icon_label.clear()
+            title_btn.setText("New Tab")
+            frame.setStyleSheet("")
+        else:
+            frame, icon_label, title_btn, close_btn = self._build_tab_chrome()
+        self.tabs_container.addWidget(frame)
+        frame.show()
+
+        # Title/icon updates are applied at most once per TAB_CHROME_DELAY_MS
+        chrome_timer = QTimer(view)
+        chrome_timer.setSingleShot(True)
+        chrome_timer.setInterval(TAB_CHROME_DELAY_MS)
+        chrome_timer.setProperty("view_id", id(view))
+        chrome_timer.timeout.connect(self._flush_tab_chrome)
+
+        self.frames[view] = frame
+        self.title_btns[view] = title_btn
+        self.close_btns[view] = close_btn
+        self.icons[view] = icon_label
+        self.last_active[view] = time.monotonic()
+        self.chrome_timers[view] = chrome_timer
+        self._urls[view] = view.url().toString()
+
+        # Shared slots look the tab up from the sender instead of per-tab closures
+        self._views_by_id[id(view)] = view
+        title_btn.setProperty("view_id", id(view))
+        close_btn.setProperty("view_id", id(view))
+
+        view.titleChanged.connect(self._on_title_changed)
+        view.iconChanged.connect(self._on_icon_changed)
+        view.urlChanged.connect(self._on_url_changed)
 
-        self.stack.addWidget(view)
+        self.switch_tab(view)
+        self._schedule_save()
 
-        # Tab button
+    def _build_tab_chrome(self):
         frame = QFrame()
         frame.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed)
         frame.setMaximumWidth(200)
@@ -140,105 +334,268 @@ class Browser(QMainWindow):
         h.addWidget(icon_label)
         h.addWidget(title_btn)
         h.addWidget(close_btn)
-        self.tabs_container.addWidget(frame)
-
-        # Track per-tab info including DevTools
-        self.tabs[view] = {
-            "frame": frame,
-            "title": title_btn,
-            "icon": icon_label,
-            "devtools": None  # <-- per-tab DevTools
-        }
 
-        title_btn.clicked.connect(lambda: self.switch_tab(view))
-        close_btn.clicked.connect(lambda: self.close_tab(view))
-
-        view.titleChanged.connect(lambda t, v=view: self.tabs[v]["title"].setText(t[:20]))
-        view.iconChanged.connect(lambda ic, v=view: self.tabs[v]["icon"].setPixmap(ic.pixmap(16,16)))
-
-        self.switch_tab(view)
+        # Connected once; the slots resolve the tab from the button's view_id
+        title_btn.clicked.connect(self._on_title_btn_clicked)
+        close_btn.clicked.connect(self._on_close_btn_clicked)
+        return frame, icon_label, title_btn, close_btn
+
+    def _on_title_btn_clicked(self):
+        self.switch_tab(self._views_by_id[self.sender().property("view_id")])
+
+    def _on_close_btn_clicked(self):
+        self.close_tab(self._views_by_id[self.sender().property("view_id")])
+
+    def _on_url_changed(self, url):
+        self._urls[self.sender()] = url.toString()
+        self._schedule_save()
+
+    def _on_title_changed(self, title):
+        view = self.sender()
+        self._pending_titles[view] = title
+        self._start_chrome_timer(view)
+
+    def _on_icon_changed(self, icon):
+        view = self.sender()
+        self._pending_icons[view] = icon
+        self._start_chrome_timer(view)
+
+    def _start_chrome_timer(self, view):
+        # Never restart a running timer: the flush picks up the latest values,
+        # so a page that changes its title constantly still updates every tick
+        timer = self.chrome_timers[view]
+        if not timer.isActive():
+            timer.start()
+
+    def _flush_tab_chrome(self):
+        view = self._views_by_id[self.sender().property("view_id")]
+        title = self._pending_titles.pop(view, None)
+        if title is not None:
+            title = title[:20]
+            title_btn = self.title_btns[view]
+            if title != title_btn.text():
+                title_btn.setText(title)
+        icon = self._pending_icons.pop(view, None)
+        if icon is not None and icon.cacheKey() != self.icon_keys.get(view):
+            self.icons[view].setPixmap(self._tab_icon_pixmap(icon))
+            self.icon_keys[view] = icon.cacheKey()
+
+    def _tab_icon_pixmap(self, icon):
+        # QIcon.pixmap() rescales on every call; reuse the 16x16 result per icon
+        key = (icon.cacheKey(), 16)
+        px = self._icon_cache.get(key)
+        if px is None:
+            px = icon.pixmap(16,16)
+            if len(self._icon_cache) >= ICON_CACHE_SIZE:
+                del self._icon_cache[next(iter(self._icon_cache))]
+            self._icon_cache[key] = px
+        return px
 
     def switch_tab(self, view):
-        self.stack.setCurrentWidget(view)
+        prev = self._active_tab
+        # Wake the page before showing it; a discarded page reloads itself here
+        if view.page().lifecycleState() != QWebEnginePage.LifecycleState.Active:
+            view.page().setLifecycleState(QWebEnginePage.LifecycleState.Active)
+        if view is not prev:
+            # Hidden views keep their parent and render surface, so switching back is cheap
+            if prev is not None:
+                prev.hide()
+            view.show()
+            self._active_tab = view
         self.url_bar.setText(view.url().toString())
-        for v in self.tabs:
-            self.tabs[v]["frame"].setStyleSheet("")
-        self.tabs[view]["frame"].setStyleSheet("background:#3c4043;border-radius:6px;")
-
-    def close_tab(self, view):
-        info = self.tabs[view]
-        if info.get("devtools"):
-            info["devtools"].close()
-        self.stack.removeWidget(view)
-        info["frame"].deleteLater()
+        # Only the outgoing tab needs restyling and freezing; every other tab already is
+        if prev is not None and prev is not view and prev in self.frames:
+            self.frames[prev].setStyleSheet("")
+            # Hidden pages stop running JS timers, animations and rendering;
+            # Qt refuses to freeze a page that DevTools is inspecting
+            if (prev not in self.devtools
+                    and prev.page().lifecycleState() == QWebEnginePage.LifecycleState.Active):
+                prev.page().setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+                self.last_active[prev] = time.monotonic()
+        self.frames[view].setStyleSheet("background:#3c4043;border-radius:6px;")
+
+    def discard_stale_tabs(self):
+        cutoff = time.monotonic() - DISCARD_AFTER_MS / 1000
+        for v, ts in self.last_active.items():
+            page = v.page()
+            if (ts < cutoff and v not in self.devtools
+                    and page.lifecycleState() == QWebEnginePage.LifecycleState.Frozen):
+                page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+
+    def close_tab(self, view, replace=True):
+        # The view lives until deleteLater runs; stop it from reaching the per-tab slots
+        view.titleChanged.disconnect(self._on_title_changed)
+        view.iconChanged.disconnect(self._on_icon_changed)
+        view.urlChanged.disconnect(self._on_url_changed)
+        dev_dock = self.devtools.pop(view, None)
+        if dev_dock:
+            dev_dock.close()
+        self.chrome_timers.pop(view).stop()
+        if view is self._active_tab:
+            self._active_tab = None
+        self.view_host_layout.removeWidget(view)
+        frame = self.frames.pop(view)
+        icon_label = self.icons.pop(view)
+        title_btn = self.title_btns.pop(view)
+        close_btn = self.close_btns.pop(view)
+        self.tabs_container.removeWidget(frame)
+        if len(self._tab_chrome_pool) < TAB_CHROME_POOL_SIZE:
+            frame.hide()
+            self._tab_chrome_pool.append((frame, icon_label, title_btn, close_btn))
+        else:
+            frame.deleteLater()
         view.deleteLater()
-        del self.tabs[view]
-        if self.tabs:
-            self.switch_tab(next(iter(self.tabs)))
+        del self.last_active[view]
+        self.icon_keys.pop(view, None)
+        del self._urls[view]
+        del self._views_by_id[id(view)]
+        self._pending_titles.pop(view, None)
+        self._pending_icons.pop(view, None)
+        self._schedule_save()
+        if not replace:
+            return
+        if self.frames:
+            self.switch_tab(next(iter(self.frames)))
         else:
             self.new_tab()
 
     def current_tab(self):
-        return self.stack.currentWidget()
+        return self._active_tab
 
     # ---------------- Navigation ----------------
-    def load_url(self):
-        text = self.url_bar.text()
-        qurl = QUrl.fromUserInput(text)
-        if qurl.scheme() == "":
-            qurl = QUrl(f"https://www.google.com/search?q={text}")
+    def load_url(self):  # perf: Qt-bound, not a candidate for JIT
+        text = self.url_bar.text().strip()
+        if _SCHEME_RE.match(text):
+            qurl = QUrl(text)
+        elif _has_known_scheme(text):
+            qurl = QUrl.fromUserInput(text)  # "data:text/html,hi", "mailto:user@host"
+        elif " " not in text and _looks_like_host(text):
+            qurl = QUrl.fromUserInput(text)  # "example.com", "localhost:8080", "intranet:3000"
+        else:
+            query = QUrl.toPercentEncoding(text).data().decode()
+            qurl = QUrl(f"https://www.google.com/search?q={query}")
         self.current_tab().setUrl(qurl)
 
     # ---------------- Bookmarks ----------------
     def load_bookmarks(self):
-        if not os.path.exists(BOOKMARKS_FILE):
+        try:
+            self.bookmarks = _load(BOOKMARKS_FILE, LEGACY_BOOKMARKS_FILE)
+        except FileNotFoundError:
             self.bookmarks = []
             return
-        with open(BOOKMARKS_FILE) as f:
-            self.bookmarks = json.load(f)
-        self.refresh_bookmark_bar()
+        self._rebuild_bookmark_bar()
 
     def save_bookmarks(self):
-        with open(BOOKMARKS_FILE, "w") as f:
-            json.dump(self.bookmarks, f, indent=4)
-
-    def refresh_bookmark_bar(self):
-        while self.bookmark_bar.count():
-            itm = self.bookmark_bar.takeAt(0)
-            if itm.widget():
-                itm.widget().deleteLater()
+        _dump(self.bookmarks, BOOKMARKS_FILE)
+
+    def _rebuild_bookmark_bar(self):  # perf: Qt-bound, not a candidate for JIT
+        # Full rebuild, only needed when the bookmark order changes
+        for btn in self._bookmark_btns:
+            self.bookmark_bar.removeWidget(btn)
+            btn.deleteLater()
+        self._bookmark_btns.clear()
         for bm in self.bookmarks:
-            btn = QPushButton(bm["title"][:15])
-            btn.clicked.connect(lambda _, url=bm["url"]: self.new_tab(url))
-            self.bookmark_bar.addWidget(btn)
+            self._append_bookmark_btn(bm)
+
+    def _append_bookmark_btn(self, bm):
+        btn = QPushButton(bm["title"][:15])
+        btn.clicked.connect(lambda _, url=bm["url"]: self.new_tab(url))
+        btn.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        btn.customContextMenuRequested.connect(self._on_bookmark_menu)
+        self.bookmark_bar.addWidget(btn)
+        self._bookmark_btns.append(btn)
+
+    def _on_bookmark_menu(self, pos):
+        btn = self.sender()
+        menu = QMenu(self)
+        remove_action = menu.addAction("Remove bookmark")
+        chosen = menu.exec(btn.mapToGlobal(pos))
+        menu.deleteLater()
+        if chosen is remove_action:
+            self.remove_bookmark(self._bookmark_btns.index(btn))
 
     def add_bookmark(self):
         tab = self.current_tab()
         if not tab:
             return
-        self.bookmarks.append({"title": tab.title(), "url": tab.url().toString()})
+        bm = {"title": tab.title(), "url": tab.url().toString()}
+        self.bookmarks.append(bm)
+        self.save_bookmarks()
+        self._append_bookmark_btn(bm)
+
+    def remove_bookmark(self, index):
+        del self.bookmarks[index]
         self.save_bookmarks()
-        self.refresh_bookmark_bar()
+        btn = self._bookmark_btns.pop(index)
+        self.bookmark_bar.removeWidget(btn)
+        btn.deleteLater()
 
     # ---------------- Extensions ----------------
     def load_extensions(self):
         if not os.path.exists(EXTENSIONS_DIR):
             os.makedirs(EXTENSIONS_DIR)
-        self.extension_list.clear()
-        self.profile.scripts().clear()
-        for file in os.listdir(EXTENSIONS_DIR):
-            if file.endswith(".js"):
-                item = QListWidgetItem(file)
-                self.extension_list.addItem(item)
-                with open(os.path.join(EXTENSIONS_DIR,file),"r",encoding="utf-8") as f:
+        # The panel only exists once the user has opened it
+        has_list = hasattr(self, "extension_list")
+        if has_list:
+            self.extension_list.clear()
+        cache = {}
+        for entry in os.scandir(EXTENSIONS_DIR):
+            if not entry.name.endswith(".js"):
+                continue
+            if has_list:
+                self.extension_list.addItem(QListWidgetItem(entry.name))
+            key = (entry.path, entry.stat().st_mtime_ns)
+            code = self._ext_cache.get(key)
+            if code is None:
+                with open(entry.path,"r",encoding="utf-8") as f:
                     code = f.read()
-                script = QWebEngineScript()
-                script.setName(file)
-                script.setSourceCode(code)
-                script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
-                script.setRunsOnSubFrames(True)
-                script.setWorldId(QWebEngineScript.ScriptWorld.MainWorld)
-                self.profile.scripts().insert(script)
+            cache[key] = code
+
+        # Nothing added, removed or modified: the profile already has the bundle
+        if list(cache) == list(self._ext_cache):
+            return
+        self._ext_cache = cache
+        self._scripts.clear()
+
+        # Files with a UserScript header keep their own script so Qt honours
+        # their @match/@include/@run-at; the rest share one bundle per page load.
+        # Each bundled file runs in its own try block: a runtime error only stops
+        # that file, and its top-level var/function declarations stay global.
+        # A syntax error in any bundled file still prevents the whole bundle from running.
+        bundled = []
+        for (path, _), src in cache.items():
+            if "// ==UserScript==" in src:
+                self._scripts.insert(self._make_script(os.path.basename(path), src))
+            else:
+                bundled.append(src)
+        if bundled:
+            self._scripts.insert(self._make_script("snowybrowser-bundle", "\n".join(
+                f"try{{\n{src}\n}}catch(e){{console.error(e);}}" for src in bundled)))
+
+    def _make_script(self, name, code):
+        script = QWebEngineScript()
+        script.setName(name)
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentReady)
+        script.setRunsOnSubFrames(True)
+        script.setWorldId(QWebEngineScript.ScriptWorld.MainWorld)
+        script.setSourceCode(code)  # last, so a UserScript @run-at overrides the default
+        return script
+
+    def _ensure_extension_dock(self):
+        if hasattr(self, "extension_dock"):
+            return
+        self.extension_dock = QDockWidget("Extensions", self)
+        self.extension_list = QListWidget()
+        self.extension_dock.setWidget(self.extension_list)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.extension_dock)
+
+    def toggle_extensions(self):
+        if hasattr(self, "extension_dock") and self.extension_dock.isVisible():
+            self.extension_dock.hide()
+            return
+        self._ensure_extension_dock()
+        self.load_extensions()  # fills the list and picks up new or edited files
+        self.extension_dock.show()
 
     # ---------------- Kill All Data ----------------
     def kill_all_data(self):
@@ -250,12 +607,52 @@ class Browser(QMainWindow):
         self.profile.cookieStore().deleteAllCookies()
         self.profile.clearHttpCache()
         self.profile.clearAllVisitedLinks()
-        storage = self.profile.persistentStoragePath()
-        if os.path.exists(storage):
-            shutil.rmtree(storage)
-        for tab in list(self.tabs.keys()):
-            self.close_tab(tab)
+        # Close every page first; the profile is released once they are gone
+        self.setUpdatesEnabled(False)
+        try:
+            for tab in list(self.frames.keys()):
+                self.close_tab(tab, replace=False)
+        finally:
+            self.setUpdatesEnabled(True)
+            self.update()
+        QTimer.singleShot(0, self._wipe_storage)
+
+    def _wipe_storage(self):
+        self._wipe_progress = None
+        storages = [p for p in dict.fromkeys((self.profile.persistentStoragePath(), self._legacy_storage))
+                    if p and os.path.exists(p)]
+        if self.profile is not QWebEngineProfile.defaultProfile():
+            # The profile itself keeps LocalStorage/IndexedDB/cookie files open, so
+            # destroy it (after the closed pages) and build a fresh one when the wipe is done
+            QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+            sip.delete(self.profile)
+            self.profile = None
+            self._scripts = None
+        if not storages:
+            self._on_storage_wiped([])
+            return
+        self._wipe_progress = QProgressDialog("Deleting browser data...", None, 0, 0, self)
+        self._wipe_progress.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self._wipe_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._wipe_progress.setMinimumDuration(0)
+        self._wipe_progress.show()
+        self._rmtree_worker = _RmtreeWorker(storages)
+        self._rmtree_worker.signals.finished.connect(self._on_storage_wiped, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(self._rmtree_worker)
+
+    def _on_storage_wiped(self, failed):
+        if self._wipe_progress is not None:
+            self._wipe_progress.close()
+            self._wipe_progress = None
+        self._rmtree_worker = None
+        if self.profile is None:
+            self._init_profile()
+            self._ext_cache = {}  # the new profile has no scripts yet
+            self.load_extensions()
         self.new_tab("about:blank")
+        if failed:
+            QMessageBox.warning(self, "Kill All Data",
+                f"{len(failed)} file(s) could not be deleted, e.g.:\n{failed[0]}")
 
     # ---------------- DevTools per tab ----------------
     def toggle_devtools(self):
@@ -263,63 +660,67 @@ class Browser(QMainWindow):
         if not tab:
             return
 
-        tab_info = self.tabs[tab]
+        dev_dock = self.devtools.get(tab)
 
         # If DevTools exists and is visible, hide it
-        if tab_info["devtools"] and tab_info["devtools"].isVisible():
-            tab_info["devtools"].hide()
+        if dev_dock and dev_dock.isVisible():
+            dev_dock.hide()
             return
 
         # Create DevTools for this tab if it doesn't exist
-        if not tab_info["devtools"]:
+        if not dev_dock:
             dev_dock = QDockWidget(f"DevTools - {tab.title()}", self)
             dev_view = QWebEngineView()
             dev_dock.setWidget(dev_view)
             self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dev_dock)
             tab.page().setDevToolsPage(dev_view.page())
-            tab_info["devtools"] = dev_dock
+            self.devtools[tab] = dev_dock
 
-        tab_info["devtools"].show()
+        dev_dock.show()
 
     # ---------------- Session ----------------
-    def closeEvent(self, event):
-        urls = [v.url().toString() for v in self.tabs]
-        with open(SESSION_FILE,"w") as f:
-            json.dump(urls,f)
+    def _schedule_save(self):
+        self._dirty = True
+        self._save_timer.start(SESSION_SAVE_DELAY_MS)
+
+    def _persist_session(self):
+        self._save_timer.stop()
+        _dump(list(self._urls.values()), SESSION_FILE)
+        self._dirty = False
+
+    def closeEvent(self, event):  # perf: Qt-bound, not a candidate for JIT
+        # Usually already saved by the debounce timer; only flush a pending write
+        if self._dirty:
+            self._persist_session()
+        # Pages have to be destroyed before the profile they were created on
+        self.discard_timer.stop()
+        for view in list(self.frames):
+            sip.delete(view)
+        self.frames.clear()
+        self._active_tab = None
         super().closeEvent(event)
 
     def restore_session(self):
-        if not os.path.exists(SESSION_FILE):
+        try:
+            urls = _load(SESSION_FILE, LEGACY_SESSION_FILE)
+        except FileNotFoundError:
+            urls = []
+        if not urls:
             self.new_tab()
             return
-        with open(SESSION_FILE) as f:
-            for u in json.load(f):
+        # One relayout for the whole session instead of one per tab
+        self.setUpdatesEnabled(False)
+        try:
+            for u in urls:
                 self.new_tab(u)
-
-    # ---------------- Style ----------------
-    def apply_style(self):
-        self.setStyleSheet("""
-        QMainWindow { background: #202124; }
-        QLineEdit {
-            background: #3c4043;
-            border-radius: 18px;
-            padding: 6px 12px;
-            color: white;
-        }
-        QPushButton {
-            background: transparent;
-            color: white;
-            border: none;
-        }
-        QPushButton:hover {
-            background: #3c4043;
-            border-radius: 6px;
-        }
-        """)
+        finally:
+            self.setUpdatesEnabled(True)
+            self.update()
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.setStyleSheet(_STYLE)
     browser = Browser()
     browser.show()
     sys.exit(app.exec())